@@ -9,13 +9,27 @@ import argparse
 import sys
 import os
 import csv
-import xml.etree.ElementTree as ET
+import io
+import logging
+import shelve
+import time
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Optional, Dict, Any
+from io import BytesIO
+from itertools import chain
+from typing import List, Optional, Dict, Any, Iterator, TextIO, Tuple, Union
+
+import requests
+from lxml import etree as ET
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from get_papers.pubmed_api import PubMedAPI
 from get_papers.affiliation_analyzer import AffiliationAnalyzer
 
+logger = logging.getLogger(__name__)
+
 
 def parse_arguments():
     """Parse command line arguments."""
@@ -67,30 +81,468 @@ Examples:
         help='Email address for NCBI (required for API key usage)'
     )
     
+    parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help='Do not read or write the local cache of fetched paper records'
+    )
+    
     return parser.parse_args()
 
 
+# PubMed XML tags and fixed-structure paths, relative to <PubmedArticle>
+TAG_PUBMED_ARTICLE = 'PubmedArticle'
+TAG_ARTICLE = 'MedlineCitation/Article'
+TAG_PMID = 'MedlineCitation/PMID'
+TAG_TITLE = 'ArticleTitle'
+TAG_PUBDATE = 'Journal/JournalIssue/PubDate'
+TAG_YEAR = 'Year'
+TAG_MONTH = 'Month'
+
+# Book and chapter records, relative to <PubmedBookArticle>
+TAG_PUBMED_BOOK_ARTICLE = 'PubmedBookArticle'
+TAG_BOOK_DOCUMENT = 'BookDocument'
+TAG_BOOK_PMID = 'BookDocument/PMID'
+TAG_BOOK_TITLE = 'Book/BookTitle'
+TAG_BOOK_PUBDATE = 'Book/PubDate'
+
+# On-disk cache of fetched <PubmedArticle> XML, keyed by PMID
+EFETCH_CACHE_PATH = Path.home() / '.cache' / 'get_papers' / 'efetch'
+
+# Output CSV columns, in order
+_FIELDNAMES = (
+    'PubmedID', 'Title', 'Publication Date',
+    'Non-academic Author(s)', 'Company Affiliation(s)', 'Corresponding Author Email'
+)
+_HEADER_LINE = ','.join(_FIELDNAMES)
+
+# Shared parser for EFetch responses; reused across papers instead of
+# building a new one per call.
+_XML_PARSER = ET.XMLParser(huge_tree=False, remove_blank_text=True)
+
+
+def _parse_xml(data: Union[str, bytes]) -> ET._Element:
+    """Parse an EFetch XML payload with the shared lxml parser."""
+    if isinstance(data, str) and data.startswith('<?xml'):
+        # lxml rejects str input carrying an encoding declaration
+        data = data.encode('utf-8')
+    return ET.fromstring(data, parser=_XML_PARSER)
+
+
+def open_efetch_cache(path: Path = EFETCH_CACHE_PATH) -> Optional[shelve.Shelf]:
+    """
+    Open the on-disk cache mapping PMIDs to article XML.
+
+    A PMID's record does not change between runs, so cached entries are never
+    invalidated. Returns None if the cache cannot be opened.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        return shelve.open(str(path))
+    except Exception as e:
+        logger.debug("Cache at %s unavailable, continuing without it: %s", path, e)
+        return None
+
+
+def _cache_key(pmid: str, retmode: str = "xml") -> str:
+    return f"{retmode}:{pmid}"
+
+
+def _cache_article(cache: shelve.Shelf, pmid: str, article_xml: str) -> None:
+    key = _cache_key(pmid)
+    if key not in cache:
+        cache[key] = article_xml
+
+
+def load_cached_papers(cache: shelve.Shelf, pmids: List[str]
+                       ) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """
+    Look up the article XML for `pmids` in the cache.
+
+    Returns (pmid, article XML) pairs for the cached PMIDs and the PMIDs that
+    still need fetching. Entries are not parsed here; iter_cached_papers
+    parses them one at a time. An entry that cannot be read back is evicted
+    and its PMID is fetched again.
+    """
+    entries, missing = [], []
+    for pmid in pmids:
+        key = _cache_key(pmid)
+        try:
+            article_xml = cache.get(key)
+        except Exception as e:
+            logger.warning("Discarding unreadable cache entry for PMID %s: %s",
+                           pmid, e)
+            del cache[key]
+            article_xml = None
+        if article_xml is None:
+            missing.append(pmid)
+        else:
+            entries.append((pmid, article_xml))
+    return entries, missing
+
+
+def iter_cached_papers(cache: shelve.Shelf,
+                       entries: List[Tuple[str, str]],
+                       refetch: List[str]) -> Iterator[Dict[str, Any]]:
+    """
+    Parse cached article XML into paper records as they are consumed.
+
+    An entry that no longer parses is evicted and its PMID appended to
+    `refetch`, to be fetched again once the cached records are processed.
+    """
+    for pmid, article_xml in entries:
+        try:
+            article_elem = _parse_xml(article_xml)
+        except ET.XMLSyntaxError as e:
+            logger.warning("Discarding corrupt cache entry for PMID %s: %s", pmid, e)
+            del cache[_cache_key(pmid)]
+            refetch.append(pmid)
+            continue
+        yield {
+            'uid': pmid,
+            'element': article_elem,
+            'xml_data': article_xml
+        }
+
+
+def configure_http_session(api: PubMedAPI, pool_size: int = 10) -> None:
+    """
+    Set up connection pooling and retries on the API client's HTTP session.
+
+    Keeps connections to E-utilities alive across fetches so concurrent
+    requests reuse TCP/TLS connections, and retries throttled or failed
+    requests with exponential backoff. Any adapter the client mounted on its
+    session is replaced.
+    """
+    session = getattr(api, 'session', None)
+    if not isinstance(session, requests.Session):
+        logger.debug("PubMedAPI exposes no requests.Session; "
+                     "connection pooling not configured")
+        return
+    retry = Retry(
+        total=5,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504]
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size,
+                          max_retries=retry)
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    logger.debug("Connection pooling enabled (pool size %d, %d retries)",
+                 pool_size, retry.total)
+
+
+class _RateLimiter:
+    """Thread-safe limiter spacing calls to at most `rate` per second."""
+
+    def __init__(self, rate: int):
+        self._interval = 1.0 / rate
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+
+    def wait(self) -> None:
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self._interval
+        delay = slot - now
+        if delay > 0:
+            time.sleep(delay)
+
+
+def fetch_papers_batch(api: PubMedAPI, pmids: List[str], retmode: str = "xml",
+                       batch_size: int = 200,
+                       api_key: Optional[str] = None) -> List[Union[str, bytes]]:
+    """
+    Fetch full records for the given PMIDs in batches.
+
+    EFetch accepts a comma-separated id list and returns a single
+    <PubmedArticleSet> per request, so each batch costs one round-trip.
+    Batches are fetched concurrently, bounded by NCBI's per-second limit
+    (10 with an API key, 3 without) both in concurrency and in request rate.
+    """
+    rate = 10 if api_key else 3
+    limiter = _RateLimiter(rate)
+    batches = [pmids[i:i + batch_size] for i in range(0, len(pmids), batch_size)]
+
+    def fetch_one(batch: List[str]) -> Optional[Union[str, bytes]]:
+        limiter.wait()
+        try:
+            # Use full fetch to get detailed author information
+            batch_xml: Union[str, bytes] = api.fetch_paper_details(
+                ','.join(batch), retmode=retmode
+            )
+        except Exception as e:
+            logger.warning("Error fetching %d PMIDs starting at %s: %s",
+                           len(batch), batch[0], e)
+            return None
+        logger.debug("Fetched %d PMIDs starting at %s", len(batch), batch[0])
+        return batch_xml
+
+    with ThreadPoolExecutor(max_workers=min(rate, len(batches) or 1)) as executor:
+        fetched = list(executor.map(fetch_one, batches))
+
+    return [batch_xml for batch_xml in fetched if batch_xml is not None]
+
+
+def article_pmid(article_elem: ET._Element) -> str:
+    """Return the PMID of a <PubmedArticle> or <PubmedBookArticle> element."""
+    pmid: str = (article_elem.findtext(TAG_PMID)
+                 or article_elem.findtext(TAG_BOOK_PMID, ''))
+    return pmid
+
+
+def extract_metadata(article_elem: ET._Element) -> Tuple[str, str]:
+    """
+    Return the title and publication date of a <PubmedArticle> or
+    <PubmedBookArticle> element.
+    """
+    title = ''
+    pubdate = ''
+    
+    article = article_elem.find(TAG_ARTICLE)
+    pubdate_path = TAG_PUBDATE
+    if article is None:
+        article = article_elem.find(TAG_BOOK_DOCUMENT)
+        pubdate_path = TAG_BOOK_PUBDATE
+    if article is not None:
+        title_elem = article.find(TAG_TITLE)
+        if title_elem is None:
+            # Whole-book records have no chapter title
+            title_elem = article.find(TAG_BOOK_TITLE)
+        if title_elem is not None:
+            title = title_elem.text or ''
+        
+        # Get publication date
+        pub_date = article.find(pubdate_path)
+        if pub_date is not None:
+            year_elem = pub_date.find(TAG_YEAR)
+            month_elem = pub_date.find(TAG_MONTH)
+            if year_elem is not None:
+                pubdate = year_elem.text or ''
+                if month_elem is not None:
+                    pubdate = f"{month_elem.text} {pubdate}"
+    
+    return title, pubdate
+
+
+def iter_papers(batches: List[Union[str, bytes]],
+                cache: Optional[shelve.Shelf] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Stream paper records out of batched EFetch responses.
+
+    Each <PubmedArticle> or <PubmedBookArticle> is yielded as soon as its end
+    tag is parsed and is cleared, along with already-processed siblings, once
+    the caller moves on, so only one article's element tree is built at a
+    time. The raw batch bodies themselves stay in memory until the generator
+    finishes.
+
+    Each record carries the parsed element under 'element', which in-process
+    consumers read without parsing again. 'xml_data' holds the article
+    serialized as text, which is what AffiliationAnalyzer takes and what goes
+    into the on-disk cache.
+    Articles not yet in `cache` are written to it as they are read.
+    """
+    for batch_xml in batches:
+        if isinstance(batch_xml, str):
+            batch_xml = batch_xml.encode('utf-8')
+        try:
+            for _, article_elem in ET.iterparse(BytesIO(batch_xml), events=('end',),
+                                                tag=(TAG_PUBMED_ARTICLE,
+                                                     TAG_PUBMED_BOOK_ARTICLE),
+                                                remove_blank_text=True):
+                paper = {
+                    'uid': article_pmid(article_elem),
+                    'element': article_elem,
+                    'xml_data': ET.tostring(article_elem, encoding='unicode',
+                                            with_tail=False)
+                }
+                if cache is not None and paper['uid']:
+                    _cache_article(cache, paper['uid'], paper['xml_data'])
+                yield paper
+                article_elem.clear()
+                while article_elem.getprevious() is not None:
+                    del article_elem.getparent()[0]
+        except ET.XMLSyntaxError as e:
+            logger.warning("Error parsing fetched XML: %s", e)
+
+
+def iter_refetched_papers(api: PubMedAPI, pmids: List[str],
+                          cache: Optional[shelve.Shelf] = None,
+                          api_key: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Fetch and stream paper records for `pmids`.
+
+    Nothing is fetched until the iterator is first advanced, so `pmids` can
+    still be filled in while earlier records are consumed, as
+    iter_cached_papers does with entries it evicts.
+    """
+    if pmids:
+        batches = fetch_papers_batch(api, pmids, api_key=api_key)
+        yield from iter_papers(batches, cache=cache)
+
+
+def analyze_paper(paper: Dict[str, Any],
+                  analyzer: AffiliationAnalyzer) -> Optional[Dict[str, str]]:
+    """
+    Build the output row for a paper, or return None if it has no
+    pharmaceutical/biotech affiliation.
+    """
+    # Analyze affiliations first so metadata is only extracted
+    # for papers that will be reported
+    authors, company_affiliations = analyzer.analyze_paper_affiliations(paper)
+    
+    # Only include papers with at least one pharma/biotech affiliation
+    if not company_affiliations:
+        return None
+    
+    # Extract paper information from XML
+    title, pubdate = extract_metadata(paper['element'])
+    
+    # Get non-academic authors
+    non_academic_authors = analyzer.get_non_academic_authors(authors)
+    
+    # Get corresponding author email
+    corresponding_email = analyzer.get_corresponding_author_email(authors)
+    
+    return {
+        'PubmedID': paper.get('uid', ''),
+        'Title': title,
+        'Publication Date': pubdate,
+        'Non-academic Author(s)': '; '.join(
+            author.name for author in non_academic_authors
+        ),
+        'Company Affiliation(s)': '; '.join(
+            aff.company_name for aff in company_affiliations
+        ),
+        'Corresponding Author Email': corresponding_email or ''
+    }
+
+
+# Analyzer used by _process_batch, set up once per worker process
+_worker_analyzer: Optional[AffiliationAnalyzer] = None
+
+
+def _init_worker() -> None:
+    global _worker_analyzer
+    _worker_analyzer = AffiliationAnalyzer()
+
+
+def _analyze_record(paper: Dict[str, Any], analyzer: AffiliationAnalyzer
+                    ) -> Tuple[str, Optional[Dict[str, str]], Optional[str]]:
+    """
+    Run analyze_paper, returning (pmid, result row or None, error or None)
+    so one failing paper does not stop the rest.
+    """
+    pmid = paper.get('uid', '')
+    try:
+        return pmid, analyze_paper(paper, analyzer), None
+    except Exception as e:
+        return pmid, None, str(e)
+
+
+def _process_batch(batch_xml: Union[str, bytes]
+                   ) -> List[Tuple[str, str, Optional[Dict[str, str]], Optional[str]]]:
+    """
+    Parse and analyze one fetched batch in a worker process.
+
+    Returns (pmid, article XML, result row or None, error or None) for each
+    article, so the main process can cache the articles without parsing them.
+    """
+    global _worker_analyzer
+    if _worker_analyzer is None:
+        _worker_analyzer = AffiliationAnalyzer()
+    records = []
+    for paper in iter_papers([batch_xml]):
+        pmid, result, error = _analyze_record(paper, _worker_analyzer)
+        records.append((pmid, paper['xml_data'], result, error))
+    return records
+
+
+def _map_in_pool(executor: ProcessPoolExecutor, batches: List[Union[str, bytes]],
+                 cache: Optional[shelve.Shelf] = None
+                 ) -> Iterator[Tuple[str, Optional[Dict[str, str]], Optional[str]]]:
+    """
+    Analyze fetched batches in the process pool, one batch per task.
+
+    Workers parse the raw batch bodies themselves, so the main process builds
+    no element trees for them. executor.map submits every batch when it is
+    called, so workers are already busy while the caller handles cached
+    records. Articles are written to `cache` here as results come back.
+    """
+    batch_results = executor.map(_process_batch, batches)
+
+    def results() -> Iterator[Tuple[str, Optional[Dict[str, str]], Optional[str]]]:
+        for records in batch_results:
+            for pmid, article_xml, result, error in records:
+                if cache is not None and pmid:
+                    _cache_article(cache, pmid, article_xml)
+                yield pmid, result, error
+
+    return results()
+
+
+def _configure_logging(debug: bool) -> None:
+    """
+    Send this module's messages out with a 'DEBUG: ' style prefix.
+
+    Debug output goes to stdout as it always has; warnings and errors go to
+    stderr so they never mix into CSV output. Only the module logger is
+    configured; the root logger is left alone, so third-party records
+    (e.g. urllib3 retries) are handled as they were before and never reach
+    stdout.
+    """
+    if not logger.handlers:
+        formatter = logging.Formatter('%(levelname)s: %(message)s')
+        stdout_handler = logging.StreamHandler(sys.stdout)
+        stdout_handler.addFilter(lambda record: record.levelno < logging.WARNING)
+        stderr_handler = logging.StreamHandler(sys.stderr)
+        stderr_handler.setLevel(logging.WARNING)
+        for handler in (stdout_handler, stderr_handler):
+            handler.setFormatter(formatter)
+            logger.addHandler(handler)
+        logger.propagate = False
+    logger.setLevel(logging.DEBUG if debug else logging.WARNING)
+
+
 def main():
     """Main function."""
     args = parse_arguments()
+    debug = args.debug
     
-    if args.debug:
-        print(f"DEBUG: Searching PubMed for: {args.query}")
-        print(f"DEBUG: Max results: {args.max_results}")
-        print(f"DEBUG: Output file: {args.file}")
+    # Reject trivially invalid invocations before building any components
+    if not args.query.strip():
+        print("Error: search query must not be empty", file=sys.stderr)
+        sys.exit(1)
+    if args.max_results <= 0:
+        print("Error: --max-results must be a positive integer", file=sys.stderr)
+        sys.exit(1)
+    if args.api_key and not args.email:
+        print("Error: --email is required when using --api-key", file=sys.stderr)
+        sys.exit(1)
+    
+    _configure_logging(debug)
+    
+    if debug:
+        logger.debug("Searching PubMed for: %s", args.query)
+        logger.debug("Max results: %s", args.max_results)
+        logger.debug("Output file: %s", args.file)
     
     # Initialize API client and analyzer
     try:
         api = PubMedAPI(api_key=args.api_key, email=args.email)
+        configure_http_session(api)
         analyzer = AffiliationAnalyzer()
     except Exception as e:
         print(f"Error initializing components: {e}", file=sys.stderr)
         sys.exit(1)
     
+    cache = None if args.no_cache else open_efetch_cache()
+    
     try:
         # Search for papers
-        if args.debug:
-            print("DEBUG: Searching PubMed...")
+        if debug:
+            logger.debug("Searching PubMed...")
         
         search_results = api.search_papers(
             query=args.query,
@@ -104,111 +556,77 @@ def main():
             print("No papers found matching your query.")
             return
         
-        if args.debug:
-            print(f"DEBUG: Found {len(pmids)} papers")
-            print(f"DEBUG: PMIDs: {pmids[:5]}...")
+        if debug:
+            logger.debug("Found %d papers", len(pmids))
+            logger.debug("PMIDs: %s...", pmids[:5])
         
         # Fetch paper details using full fetch for better affiliation data
-        if args.debug:
-            print("DEBUG: Fetching paper details...")
+        if debug:
+            logger.debug("Fetching paper details...")
         
-        papers = []
-        for pmid in pmids:
-            try:
-                # Use full fetch to get detailed author information
-                paper_xml = api.fetch_paper_details(pmid, retmode="xml")
-                papers.append({
-                    'uid': pmid,
-                    'xml_data': paper_xml
-                })
-                if args.debug:
-                    print(f"DEBUG: Fetched PMID {pmid}")
-            except Exception as e:
-                if args.debug:
-                    print(f"DEBUG: Error fetching PMID {pmid}: {e}")
-                continue
+        cached_papers: Iterator[Dict[str, Any]] = iter(())
+        missing = pmids
+        refetch: List[str] = []
+        if cache is not None:
+            entries, missing = load_cached_papers(cache, pmids)
+            cached_papers = iter_cached_papers(cache, entries, refetch)
+            if debug:
+                logger.debug("%d papers found in cache", len(entries))
         
-        if args.debug:
-            print(f"DEBUG: Successfully retrieved {len(papers)} papers")
+        batches: List[Union[str, bytes]] = []
+        if missing:
+            batches.extend(fetch_papers_batch(api, missing, api_key=args.api_key))
         
-        # Process papers to find pharmaceutical/biotech affiliations
+        # Process papers to find pharmaceutical/biotech affiliations.
+        # Parsing and analysis are CPU-bound, so when more than one batch was
+        # fetched the batches are spread over processes, one per task; each
+        # worker builds its own analyzer. Cached and refetched papers are
+        # analyzed here while the workers run.
         results = []
+        paper_count = 0
         
-        for paper in papers:
-            try:
-                # Extract paper information from XML
-                pmid = paper.get('uid', '')
-                title = ''
-                pubdate = ''
-                
-                if 'xml_data' in paper:
-                    # Parse XML to get title and publication date
-                    try:
-                        root = ET.fromstring(paper['xml_data'])
-                        article = root.find('.//Article')
-                        if article is not None:
-                            title_elem = article.find('.//ArticleTitle')
-                            if title_elem is not None:
-                                title = title_elem.text or ''
-                            
-                            # Get publication date
-                            pub_date = root.find('.//PubDate')
-                            if pub_date is not None:
-                                year_elem = pub_date.find('Year')
-                                month_elem = pub_date.find('Month')
-                                if year_elem is not None:
-                                    pubdate = year_elem.text or ''
-                                    if month_elem is not None:
-                                        pubdate = f"{month_elem.text} {pubdate}"
-                    except Exception as e:
-                        if args.debug:
-                            print(f"DEBUG: Error parsing XML for PMID {pmid}: {e}")
-                else:
-                    # Fallback to summary data
-                    paper_data = paper
-                    if 'result' in paper and isinstance(paper['result'], dict):
-                        for key, value in paper['result'].items():
-                            if key != 'uids' and isinstance(value, dict):
-                                paper_data = value
-                                break
-                    
-                    title = paper_data.get('title', '')
-                    pubdate = paper_data.get('pubdate', '')
+        workers = min(os.cpu_count() or 1, len(batches))
+        executor = None
+        fetched: Iterator[Tuple[str, Optional[Dict[str, str]], Optional[str]]]
+        if workers > 1:
+            executor = ProcessPoolExecutor(max_workers=workers,
+                                           initializer=_init_worker)
+            fetched = _map_in_pool(executor, batches, cache)
+        else:
+            fetched = (_analyze_record(paper, analyzer)
+                       for paper in iter_papers(batches, cache=cache))
+        refetched = iter_refetched_papers(api, refetch, cache, args.api_key)
+        processed = chain(
+            (_analyze_record(paper, analyzer) for paper in cached_papers),
+            fetched,
+            (_analyze_record(paper, analyzer) for paper in refetched)
+        )
+        
+        try:
+            for pmid, result, error in processed:
+                paper_count += 1
+                if error is not None:
+                    if debug:
+                        logger.debug("Error processing PMID %s: %s", pmid, error)
+                    continue
+                if result is None:
+                    continue
                 
-                # Analyze affiliations
-                authors, company_affiliations = analyzer.analyze_paper_affiliations(paper)
+                results.append(result)
                 
-                # Only include papers with at least one pharma/biotech affiliation
-                if company_affiliations:
-                    # Get non-academic authors
-                    non_academic_authors = analyzer.get_non_academic_authors(authors)
-                    non_academic_names = [author.name for author in non_academic_authors]
-                    
-                    # Get company affiliations
-                    company_names = [aff.company_name for aff in company_affiliations]
-                    
-                    # Get corresponding author email
-                    corresponding_email = analyzer.get_corresponding_author_email(authors)
-                    
-                    # Create result row
-                    result = {
-                        'PubmedID': pmid,
-                        'Title': title,
-                        'Publication Date': pubdate,
-                        'Non-academic Author(s)': '; '.join(non_academic_names) if non_academic_names else '',
-                        'Company Affiliation(s)': '; '.join(company_names) if company_names else '',
-                        'Corresponding Author Email': corresponding_email or ''
-                    }
-                    
-                    results.append(result)
-                    
-                    if args.debug:
-                        print(f"DEBUG: Found pharma affiliation in PMID {pmid}: {company_names}")
-            
-            except Exception as e:
-                if args.debug:
-                    print(f"DEBUG: Error processing paper: {e}")
-                continue
+                if debug:
+                    logger.debug("Found pharma affiliation in PMID %s: %s",
+                                 pmid, result['Company Affiliation(s)'])
+        finally:
+            if executor is not None:
+                executor.shutdown()
+        
+        if debug:
+            logger.debug("Successfully processed %d papers", paper_count)
+        
+        # Cached papers are processed first; restore ESearch relevance order
+        position = {pmid: i for i, pmid in enumerate(pmids)}
+        results.sort(key=lambda result: position.get(result['PubmedID'], len(position)))
         
         if not results:
             print("No papers found with pharmaceutical/biotech company affiliations.")
@@ -231,42 +649,48 @@ def main():
         print(f"Error: {e}", file=sys.stderr)
         sys.exit(1)
     finally:
+        if cache is not None:
+            cache.close()
         api.close()
 
 
 def write_csv_results(results: List[Dict[str, str]], filename: str) -> None:
     """Write results to CSV file."""
-    fieldnames = [
-        'PubmedID', 'Title', 'Publication Date', 
-        'Non-academic Author(s)', 'Company Affiliation(s)', 'Corresponding Author Email'
-    ]
-    
-    with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-        writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-        writer.writeheader()
-        writer.writerows(results)
+    # Large write buffer keeps syscalls down for big result sets
+    with open(filename, 'w', newline='', encoding='utf-8',
+              buffering=1 << 20) as csvfile:
+        writer = csv.writer(csvfile)
+        csvfile.write(_HEADER_LINE + writer.dialect.lineterminator)
+        writer.writerows(tuple(result.get(field, '') for field in _FIELDNAMES)
+                         for result in results)
+
+
+def _write_console_rows(out: TextIO, results: List[Dict[str, str]]) -> None:
+    writer = csv.writer(out, lineterminator='\n')
+    out.write(_HEADER_LINE + '\n')
+    writer.writerows([result.get(field, '') for field in _FIELDNAMES]
+                     for result in results)
 
 
 def print_csv_results(results: List[Dict[str, str]]) -> None:
     """Print results to console in CSV format."""
-    fieldnames = [
-        'PubmedID', 'Title', 'Publication Date', 
-        'Non-academic Author(s)', 'Company Affiliation(s)', 'Corresponding Author Email'
-    ]
+    sys.stdout.flush()
+    buffer = getattr(sys.stdout, 'buffer', None)
+    if buffer is None:
+        _write_console_rows(sys.stdout, results)
+        return
     
-    # Print header
-    print(','.join(fieldnames))
-    
-    # Print data rows
-    for result in results:
-        row = []
-        for field in fieldnames:
-            value = result.get(field, '')
-            # Escape commas and quotes in CSV
-            if ',' in value or '"' in value:
-                value = f'"{value.replace('"', '""')}"'
-            row.append(value)
-        print(','.join(row))
+    # Write through a block-buffered wrapper so rows go out in a few large
+    # writes instead of one per line
+    out = io.TextIOWrapper(buffer, encoding=sys.stdout.encoding,
+                           errors=sys.stdout.errors,
+                           line_buffering=False, write_through=False)
+    try:
+        _write_console_rows(out, results)
+        out.flush()
+    finally:
+        # Release sys.stdout's buffer without closing it
+        out.detach()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,39 @@
+"""Shared fixtures for the CLI tests."""
+
+import sys
+import types
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+try:
+    import get_papers  # noqa: F401
+except ImportError:
+    # The get_papers package is not part of this tree; register placeholders
+    # so cli imports. Tests patch in the behaviour they need.
+    package = types.ModuleType('get_papers')
+    package.__path__ = []
+    pubmed_api = types.ModuleType('get_papers.pubmed_api')
+    affiliation_analyzer = types.ModuleType('get_papers.affiliation_analyzer')
+    pubmed_api.PubMedAPI = type('PubMedAPI', (), {})
+    affiliation_analyzer.AffiliationAnalyzer = type('AffiliationAnalyzer', (), {})
+    package.pubmed_api = pubmed_api
+    package.affiliation_analyzer = affiliation_analyzer
+    sys.modules['get_papers'] = package
+    sys.modules['get_papers.pubmed_api'] = pubmed_api
+    sys.modules['get_papers.affiliation_analyzer'] = affiliation_analyzer
+
+import pytest  # noqa: E402
+
+import cli  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def restore_cli_logger():
+    """Undo the handlers main() installs on the module logger."""
+    handlers = list(cli.logger.handlers)
+    level, propagate = cli.logger.level, cli.logger.propagate
+    yield
+    cli.logger.handlers[:] = handlers
+    cli.logger.setLevel(level)
+    cli.logger.propagate = propagate
@@ -0,0 +1,475 @@
+"""Tests for the get-papers-list command line interface."""
+
+import csv
+import io
+import logging
+import shelve
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from types import SimpleNamespace
+
+import pytest
+import requests
+
+import cli
+
+
+def make_article(pmid, title='A study'):
+    return (
+        f'<PubmedArticle><MedlineCitation><PMID>{pmid}</PMID><Article>'
+        '<Journal><JournalIssue><PubDate><Year>2020</Year><Month>Jan</Month>'
+        f'</PubDate></JournalIssue></Journal><ArticleTitle>{title}</ArticleTitle>'
+        f'<AuthorList><Author><LastName>Author{pmid}</LastName></Author>'
+        '</AuthorList></Article></MedlineCitation></PubmedArticle>'
+    )
+
+
+def make_book_article(pmid, title='A book'):
+    return (
+        f'<PubmedBookArticle><BookDocument><PMID>{pmid}</PMID><Book>'
+        f'<BookTitle>{title}</BookTitle><PubDate><Year>2019</Year></PubDate>'
+        '</Book></BookDocument></PubmedBookArticle>'
+    )
+
+
+def make_batch(pmids, articles=None):
+    if articles is None:
+        articles = ''.join(make_article(pmid) for pmid in pmids)
+    return (
+        '<?xml version="1.0" encoding="UTF-8"?>\n'
+        f'<PubmedArticleSet>{articles}</PubmedArticleSet>'
+    )
+
+
+class FakeAPI:
+    def __init__(self, pmids, failing=()):
+        self.pmids = pmids
+        self.failing = set(failing)
+        self.fetched = []
+
+    def search_papers(self, query, max_results):
+        return {'esearchresult': {'idlist': list(self.pmids)}}
+
+    def fetch_paper_details(self, pmid, retmode='xml'):
+        ids = pmid.split(',')
+        if self.failing.intersection(ids):
+            raise RuntimeError('HTTP 500')
+        self.fetched.extend(ids)
+        return make_batch(ids)
+
+    def close(self):
+        pass
+
+
+class FakeAnalyzer:
+    """Reports every author as working for Pfizer."""
+
+    def analyze_paper_affiliations(self, paper):
+        assert isinstance(paper['xml_data'], str)
+        authors = [SimpleNamespace(name=f"Author{paper['uid']}",
+                                   company_name='Pfizer')]
+        return authors, authors
+
+    def get_non_academic_authors(self, authors):
+        return authors
+
+    def get_corresponding_author_email(self, authors):
+        return 'author@example.com'
+
+
+@pytest.fixture
+def cache(tmp_path):
+    with shelve.open(str(tmp_path / 'efetch')) as shelf:
+        yield shelf
+
+
+@pytest.fixture
+def run_main(mocker, tmp_path):
+    """Run main() against a fake client, with the cache kept in tmp_path."""
+    def run(api, *args):
+        mocker.patch.object(cli, 'PubMedAPI', return_value=api)
+        mocker.patch.object(cli, 'AffiliationAnalyzer', FakeAnalyzer)
+        mocker.patch.object(cli, 'open_efetch_cache',
+                            lambda: shelve.open(str(tmp_path / 'efetch')))
+        mocker.patch.object(sys, 'argv', ['get-papers-list', 'cancer', *args])
+        cli.main()
+    return run
+
+
+@pytest.fixture
+def results():
+    return [
+        {
+            'PubmedID': '1',
+            'Title': 'Drug "X", revisited',
+            'Publication Date': 'Jan 2020',
+            'Non-academic Author(s)': 'Smith',
+            'Company Affiliation(s)': 'Pfizer',
+            'Corresponding Author Email': 'smith@example.com',
+        },
+        {
+            'PubmedID': '2',
+            'Title': 'Another study',
+            'Publication Date': '2021',
+            'Non-academic Author(s)': 'Jones; Lee',
+            'Company Affiliation(s)': 'Moderna',
+            'Corresponding Author Email': '',
+        },
+    ]
+
+
+def read_pmids(path):
+    rows = path.read_text(encoding='utf-8').splitlines()[1:]
+    return [row.split(',')[0] for row in rows]
+
+
+class TestRateLimiter:
+    def test_spaces_calls_by_interval(self, mocker):
+        mocker.patch.object(cli.time, 'monotonic', return_value=100.0)
+        sleep = mocker.patch.object(cli.time, 'sleep')
+        limiter = cli._RateLimiter(4)
+
+        for _ in range(3):
+            limiter.wait()
+
+        assert [call.args[0] for call in sleep.call_args_list] == [
+            pytest.approx(0.25), pytest.approx(0.5)
+        ]
+
+    def test_no_wait_once_interval_has_passed(self, mocker):
+        clock = mocker.patch.object(cli.time, 'monotonic', return_value=100.0)
+        sleep = mocker.patch.object(cli.time, 'sleep')
+        limiter = cli._RateLimiter(4)
+
+        limiter.wait()
+        clock.return_value = 100.3
+        limiter.wait()
+
+        sleep.assert_not_called()
+
+
+class TestConfigureHttpSession:
+    def test_mounts_pooled_retrying_adapter(self):
+        api = SimpleNamespace(session=requests.Session())
+
+        cli.configure_http_session(api, pool_size=4)
+
+        for url in ('https://eutils.ncbi.nlm.nih.gov/', 'http://example.org/'):
+            adapter = api.session.get_adapter(url)
+            assert isinstance(adapter, requests.adapters.HTTPAdapter)
+            assert adapter._pool_maxsize == 4
+            assert adapter.max_retries.total == 5
+            assert 429 in adapter.max_retries.status_forcelist
+
+    def test_client_without_session_is_logged(self, caplog):
+        with caplog.at_level(logging.DEBUG, logger='cli'):
+            cli.configure_http_session(SimpleNamespace())
+
+        assert 'connection pooling not configured' in caplog.text
+
+
+class TestFetchPapersBatch:
+    @pytest.fixture(autouse=True)
+    def no_sleep(self, mocker):
+        mocker.patch.object(cli.time, 'sleep')
+
+    def test_fetches_in_batches(self):
+        api = FakeAPI([])
+
+        batches = cli.fetch_papers_batch(api, ['1', '2', '3'], batch_size=2)
+
+        assert api.fetched == ['1', '2', '3']
+        assert batches == [make_batch(['1', '2']), make_batch(['3'])]
+
+    def test_failed_batch_is_reported_as_warning(self, caplog):
+        api = FakeAPI([], failing=['3'])
+
+        with caplog.at_level(logging.WARNING, logger='cli'):
+            batches = cli.fetch_papers_batch(api, ['1', '2', '3'], batch_size=2)
+
+        assert batches == [make_batch(['1', '2'])]
+        assert [record.levelno for record in caplog.records] == [logging.WARNING]
+        assert 'Error fetching 1 PMIDs starting at 3' in caplog.text
+
+
+class TestIterPapers:
+    def test_yields_articles_from_each_batch(self):
+        papers = cli.iter_papers([make_batch(['1', '2']), make_batch(['3']).encode()])
+
+        uids = []
+        for paper in papers:
+            uids.append(paper['uid'])
+            assert paper['element'].findtext(cli.TAG_PMID) == paper['uid']
+
+        assert uids == ['1', '2', '3']
+
+    def test_clears_articles_once_consumed(self):
+        papers = cli.iter_papers([make_batch(['1', '2', '3'])])
+
+        first = next(papers)['element']
+        second = next(papers)['element']
+        assert len(first) == 0
+
+        third = next(papers)['element']
+        assert len(second) == 0
+        assert third.getprevious() is second
+        assert second.getprevious() is None
+
+    def test_skips_malformed_batch(self):
+        papers = cli.iter_papers(['<PubmedArticleSet><Pubmed', make_batch(['4'])])
+
+        assert [paper['uid'] for paper in papers] == ['4']
+
+
+def test_records_carry_article_text():
+    paper = next(cli.iter_papers([make_batch(['1'], make_article('1', 'Café'))]))
+
+    assert paper['xml_data'] == make_article('1', 'Café')
+    assert cli._parse_xml(paper['xml_data']).findtext('.//ArticleTitle') == 'Café'
+    assert cli._parse_xml(make_batch(['2'])).findtext('.//PMID') == '2'
+
+
+def test_book_articles_are_included():
+    articles = make_article('1') + make_book_article('2', title='Gene Reviews')
+    batch = make_batch([], articles=articles)
+
+    metadata = {paper['uid']: cli.extract_metadata(paper['element'])
+                for paper in cli.iter_papers([batch])}
+
+    assert metadata == {'1': ('A study', 'Jan 2020'), '2': ('Gene Reviews', '2019')}
+
+
+class TestCache:
+    def test_iter_papers_writes_new_articles_to_cache(self, cache):
+        list(cli.iter_papers([make_batch(['1', '2'])], cache=cache))
+
+        assert set(cache) == {cli._cache_key('1'), cli._cache_key('2')}
+        cached = cli._parse_xml(cache[cli._cache_key('2')])
+        assert cached.findtext(cli.TAG_PMID) == '2'
+
+    def test_load_returns_cached_entries_and_missing_pmids(self, cache):
+        list(cli.iter_papers([make_batch(['1', '3'])], cache=cache))
+
+        entries, missing = cli.load_cached_papers(cache, ['3', '2', '1'])
+
+        assert [pmid for pmid, _ in entries] == ['3', '1']
+        assert missing == ['2']
+
+    def test_cached_papers_are_parsed_lazily(self, cache):
+        list(cli.iter_papers([make_batch(['1', '2'])], cache=cache))
+        entries, _ = cli.load_cached_papers(cache, ['1', '2'])
+
+        papers = cli.iter_cached_papers(cache, entries, [])
+
+        assert next(papers)['element'].findtext(cli.TAG_PMID) == '1'
+        assert next(papers)['element'].findtext(cli.TAG_PMID) == '2'
+
+    def test_corrupt_entry_is_evicted_and_refetched(self, cache):
+        list(cli.iter_papers([make_batch(['1', '2'])], cache=cache))
+        cache[cli._cache_key('2')] = '<PubmedArticle><Medline'
+        entries, missing = cli.load_cached_papers(cache, ['1', '2'])
+        refetch = []
+
+        papers = list(cli.iter_cached_papers(cache, entries, refetch))
+
+        assert [paper['uid'] for paper in papers] == ['1']
+        assert missing == []
+        assert refetch == ['2']
+        assert cli._cache_key('2') not in cache
+
+    def test_unreadable_entry_is_evicted(self, cache):
+        list(cli.iter_papers([make_batch(['1', '2'])], cache=cache))
+        # A pickle cut short, as left behind by an interrupted write
+        cache.dict[cli._cache_key('2').encode()] = b'\x80\x04\x95\x10\x00'
+
+        entries, missing = cli.load_cached_papers(cache, ['1', '2'])
+
+        assert [pmid for pmid, _ in entries] == ['1']
+        assert missing == ['2']
+        assert cli._cache_key('2') not in cache
+
+    def test_unavailable_cache_is_logged(self, tmp_path, caplog):
+        blocker = tmp_path / 'blocker'
+        blocker.write_text('')
+
+        with caplog.at_level(logging.DEBUG, logger='cli'):
+            assert cli.open_efetch_cache(blocker / 'efetch' / 'db') is None
+
+        assert 'continuing without it' in caplog.text
+
+    def test_results_follow_search_order_with_partial_cache(self, run_main,
+                                                            tmp_path):
+        output = tmp_path / 'results.csv'
+        # Warm the cache with the PMIDs that rank last
+        run_main(FakeAPI(['7', '3']), '-f', str(output))
+
+        api = FakeAPI(['5', '3', '9', '7'])
+        run_main(api, '-f', str(output))
+
+        assert api.fetched == ['5', '9']
+        assert read_pmids(output) == ['5', '3', '9', '7']
+
+    def test_corrupt_entry_is_refetched_in_the_same_run(self, run_main,
+                                                        tmp_path):
+        output = tmp_path / 'results.csv'
+        run_main(FakeAPI(['1', '2']), '-f', str(output))
+        with shelve.open(str(tmp_path / 'efetch')) as shelf:
+            shelf[cli._cache_key('1')] = '<PubmedArticle'
+
+        api = FakeAPI(['1', '2', '3'])
+        run_main(api, '-f', str(output))
+
+        assert api.fetched == ['3', '1']
+        assert read_pmids(output) == ['1', '2', '3']
+
+    def test_no_cache_fetches_everything(self, run_main, tmp_path):
+        output = tmp_path / 'results.csv'
+        run_main(FakeAPI(['1', '2']), '-f', str(output))
+
+        api = FakeAPI(['1', '2'])
+        run_main(api, '--no-cache', '-f', str(output))
+
+        assert api.fetched == ['1', '2']
+
+
+class TestProcessPool:
+    @pytest.fixture
+    def executor(self, mocker):
+        mocker.patch.object(cli.time, 'sleep')
+        mocker.patch.object(cli, 'fetch_papers_batch',
+                            partial(cli.fetch_papers_batch, batch_size=2))
+        return mocker.patch.object(cli, 'ProcessPoolExecutor',
+                                   wraps=ProcessPoolExecutor)
+
+    def test_batches_are_analyzed_in_worker_processes(self, run_main, executor,
+                                                      mocker, tmp_path):
+        output = tmp_path / 'results.csv'
+        run_main(FakeAPI(['4']), '-f', str(output))
+        mocker.patch.object(cli.os, 'cpu_count', return_value=4)
+
+        api = FakeAPI(['1', '2', '3', '4', '5', '6', '7'])
+        run_main(api, '-f', str(output))
+
+        assert executor.call_args.kwargs['max_workers'] == 3
+        assert api.fetched == ['1', '2', '3', '5', '6', '7']
+        assert read_pmids(output) == ['1', '2', '3', '4', '5', '6', '7']
+        with shelve.open(str(tmp_path / 'efetch')) as shelf:
+            assert len(shelf) == 7
+
+    def test_single_batch_is_analyzed_in_process(self, run_main, executor,
+                                                 mocker, tmp_path):
+        mocker.patch.object(cli.os, 'cpu_count', return_value=4)
+
+        run_main(FakeAPI(['1', '2']), '-f', str(tmp_path / 'results.csv'))
+
+        executor.assert_not_called()
+
+    def test_process_batch(self, mocker):
+        mocker.patch.object(cli, '_worker_analyzer', FakeAnalyzer())
+
+        records = cli._process_batch(make_batch(['1', '2']))
+
+        assert [(pmid, xml) for pmid, xml, _, _ in records] == [
+            ('1', make_article('1')), ('2', make_article('2'))
+        ]
+        assert all(result['Company Affiliation(s)'] == 'Pfizer' and error is None
+                   for _, _, result, error in records)
+
+
+@pytest.mark.parametrize('args, message', [
+    (['  '], 'search query must not be empty'),
+    (['cancer', '--max-results', '0'], '--max-results must be a positive integer'),
+    (['cancer', '--max-results', '-5'], '--max-results must be a positive integer'),
+    (['cancer', '--api-key', 'KEY'], '--email is required when using --api-key'),
+])
+def test_invalid_arguments_exit_before_client(args, message, mocker, capsys):
+    client = mocker.patch.object(cli, 'PubMedAPI')
+    mocker.patch.object(sys, 'argv', ['get-papers-list', *args])
+
+    with pytest.raises(SystemExit) as excinfo:
+        cli.main()
+
+    assert excinfo.value.code == 1
+    assert capsys.readouterr().err == f'Error: {message}\n'
+    client.assert_not_called()
+
+
+class TestLogging:
+    @pytest.fixture
+    def corrupt_cache(self, tmp_path):
+        with shelve.open(str(tmp_path / 'efetch')) as shelf:
+            shelf[cli._cache_key('1')] = '<PubmedArticle'
+            shelf[cli._cache_key('2')] = make_article('2')
+
+    def test_warnings_go_to_stderr(self, run_main, corrupt_cache, capsys):
+        run_main(FakeAPI(['1', '2']))
+
+        captured = capsys.readouterr()
+        assert captured.out.startswith('PubmedID,')
+        assert 'WARNING' not in captured.out
+        assert captured.err.startswith(
+            'WARNING: Discarding corrupt cache entry for PMID 1'
+        )
+
+    def test_debug_output_goes_to_stdout(self, run_main, corrupt_cache, capsys):
+        run_main(FakeAPI(['1', '2']), '-d')
+
+        captured = capsys.readouterr()
+        assert captured.out.startswith('DEBUG: Searching PubMed for: cancer\n')
+        assert 'DEBUG' not in captured.err
+        assert 'WARNING: Discarding corrupt cache entry' in captured.err
+
+
+def test_header_line_matches_csv_writer():
+    out = io.StringIO()
+    csv.writer(out, lineterminator='').writerow(cli._FIELDNAMES)
+
+    assert cli._HEADER_LINE == out.getvalue()
+
+
+def test_write_csv_results(results, tmp_path):
+    output = tmp_path / 'results.csv'
+
+    cli.write_csv_results(results, str(output))
+
+    assert output.read_bytes().decode('utf-8') == (
+        'PubmedID,Title,Publication Date,Non-academic Author(s),'
+        'Company Affiliation(s),Corresponding Author Email\r\n'
+        '1,"Drug ""X"", revisited",Jan 2020,Smith,Pfizer,smith@example.com\r\n'
+        '2,Another study,2021,Jones; Lee,Moderna,\r\n'
+    )
+
+
+def test_print_csv_results(results, capsys):
+    print('before')
+
+    cli.print_csv_results(results)
+
+    assert capsys.readouterr().out == (
+        'before\n'
+        'PubmedID,Title,Publication Date,Non-academic Author(s),'
+        'Company Affiliation(s),Corresponding Author Email\n'
+        '1,"Drug ""X"", revisited",Jan 2020,Smith,Pfizer,smith@example.com\n'
+        '2,Another study,2021,Jones; Lee,Moderna,\n'
+    )
+
+
+def test_print_csv_results_without_byte_buffer(results, mocker):
+    out = io.StringIO()
+    mocker.patch.object(sys, 'stdout', out)
+
+    cli.print_csv_results(results)
+
+    assert out.getvalue().splitlines()[1:] == [
+        '1,"Drug ""X"", revisited",Jan 2020,Smith,Pfizer,smith@example.com',
+        '2,Another study,2021,Jones; Lee,Moderna,',
+    ]
+
+
+def test_print_csv_results_leaves_stdout_usable(results, capsys):
+    cli.print_csv_results(results)
+    print('after')
+
+    assert capsys.readouterr().out.endswith('2,Another study,2021,Jones; Lee,Moderna,\n'
+                                            'after\n')